@@ -1,16 +1,162 @@
+import datetime as _dt
+import functools
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
-from urllib.parse import urlparse
+import re
+import sys
+from concurrent.futures import Executor
+from itertools import repeat
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    _json_loads = json.loads
 
 logger = logging.getLogger("booking_reviews_scraper.booking_parser")
 
+# Selectors are compiled once at import time and reused for every page.
+_SEL_REVIEW_CARD = CSSSelector('[data-testid="review-card"]')
+_SEL_REVIEW_SUBSCORE = CSSSelector('[data-testid="review-subscore"]')
+_SEL_REVIEW_SUBSCORE_TITLE = CSSSelector('[data-testid="review-subscore-title"]')
+_SEL_REVIEW_SUBSCORE_VALUE = CSSSelector('[data-testid="review-subscore-value"]')
+_SEL_REVIEW_SCORE_SUBTITLE = CSSSelector('[data-testid="review-score-subtitle"]')
+_XPATH_JSON_LD = etree.XPath('//script[@type="application/ld+json"]')
+
+# Fallbacks for older/alternative review markup
+_SEL_REVIEW_CARD_FALLBACK = CSSSelector('.review_list_new_item_block, [itemprop="review"]')
+_SEL_SCORE_FALLBACK = CSSSelector('.bui-review-score__badge, [itemprop="ratingValue"]')
+_SEL_TITLE_FALLBACK = CSSSelector(".review-title")
+_SEL_NAME_FALLBACK = CSSSelector(".bui-avatar-block__title")
+_SEL_COUNTRY_FALLBACK = CSSSelector(".bui-avatar-block__subtitle")
+
+# data-testid values read from inside a single review card
+_CARD_TESTIDS = frozenset(
+    {
+        "review-score",
+        "review-title",
+        "review-date",
+        "review-positive-text",
+        "review-negative-text",
+        "reviewer-name",
+        "reviewer-country",
+        "reviewer-type",
+        "review-room-type",
+        "review-stay-date",
+        "review-customer-type",
+    }
+)
+# Only elements carrying a data-testid reach Python; libxml2 skips the rest
+_XPATH_TESTID_ELEMENTS = etree.XPath("descendant-or-self::*[@data-testid]")
+
+# A run of digits, allowing thousands separators ("1,263" / "1.263" / "1 263");
+# a separator only counts when exactly three digits follow it
+_DIGITS_RE = re.compile(r"\d+(?:[,.\u00a0 ]\d{3}(?!\d))*")
+_NON_DIGIT_RE = re.compile(r"\D")
+_LABEL_SUB = re.compile(r"[\s\-]+")
+_ABSOLUTE_URL_PREFIXES = ("http://", "https://")
+
+@functools.lru_cache(maxsize=8)
+def _html_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    # One reusable parser per encoding. Comments, processing instructions and
+    # the id index are never used, so libxml2 is told to skip them. Parsers
+    # are not thread-safe; pages are parsed on the consuming thread only.
+    return lxml.html.HTMLParser(
+        encoding=encoding,
+        remove_comments=True,
+        remove_pis=True,
+        collect_ids=False,
+    )
+
+def parse_html(html: Union[str, bytes], encoding: Optional[str] = None):
+    """
+    Parse a full review page into an lxml tree. The paginator and the review
+    parser share the tree built here, so each page is parsed only once.
+
+    Raw bytes are decoded by libxml2 itself, using ``encoding`` (e.g. the
+    HTTP charset) when given and the document's <meta charset> otherwise.
+    An encoding libxml2 does not know is ignored.
+    """
+    if not isinstance(html, bytes):
+        encoding = None
+    try:
+        parser = _html_parser(encoding)
+    except LookupError:
+        logger.debug("Unknown encoding %r, falling back to document charset", encoding)
+        parser = _html_parser(None)
+    return lxml.html.fromstring(html, parser=parser)
+
+@functools.lru_cache(maxsize=256)
+def _normalize_score_label(label: str) -> str:
+    # Subscore labels repeat on every page, so results are memoized
+    return _LABEL_SUB.sub("_", label.strip().lower())
+
+@functools.lru_cache(maxsize=256)
+def _normalize_lang(code: str) -> str:
+    # A handful of language codes repeat across every review; share one string each
+    return sys.intern(code.strip().lower())
+
+def _first(selector: CSSSelector, node):
+    matches = selector(node)
+    return matches[0] if matches else None
+
+def _index_by_testid(card) -> Dict[str, Any]:
+    """
+    Walk the card once and map each wanted data-testid to its first element,
+    instead of searching the subtree again for every field.
+    """
+    fields: Dict[str, Any] = {}
+    for el in _XPATH_TESTID_ELEMENTS(card):
+        tid = el.get("data-testid")
+        if tid in _CARD_TESTIDS and tid not in fields:
+            fields[tid] = el
+    return fields
+
 def _safe_text(node) -> str:
-    if not node:
+    if node is None:
         return ""
-    return " ".join(node.get_text(strip=True).split())
+    return " ".join(node.text_content().split())
+
+class Review(NamedTuple):
+    """
+    A single parsed review with a fixed field layout. Field order matches
+    the tabular export columns (see outputs.dataset_exporter).
+    """
+
+    score: Optional[float]
+    review_date: Optional[int]
+    title: str
+    positive: str
+    negative: str
+    language: Optional[str]
+    guest_name: Optional[str]
+    guest_country: Optional[str]
+    guest_type: Optional[str]
+    room_type: Optional[str]
+    check_in: Optional[str]
+    check_out: Optional[str]
+    nights: Optional[int]
+    customer_type: Optional[str]
+    photos: Tuple[str, ...]
+
+def _parse_card_worker(
+    fragment: bytes,
+    page_language: Optional[str],
+    language_hint: Optional[str],
+) -> Optional[Review]:
+    """
+    Process-pool entry point: rebuild a single review card from its
+    serialized HTML and parse it. Must stay a module-level function so it
+    can be pickled by reference.
+    """
+    card = lxml.html.fragment_fromstring(fragment)
+    return BookingReviewParser(language_hint=language_hint)._parse_card_safely(card, page_language)
 
 class BookingReviewParser:
     """
@@ -18,16 +164,29 @@ class BookingReviewParser:
 
     The HTML structure of Booking.com can change over time, so this parser
     is intentionally defensive and uses multiple strategies for each field.
+
+    If an ``executor`` (typically a ``ProcessPoolExecutor``) is given, review
+    cards are serialized and parsed on it in parallel; otherwise they are
+    parsed sequentially in the calling thread.
     """
 
-    def __init__(self, language_hint: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        language_hint: Optional[str] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
         self.language_hint = language_hint
+        self.executor = executor
 
-    def parse(self, html: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
-        soup = BeautifulSoup(html, "lxml")
+    def parse(self, document) -> Tuple[Dict[str, Any], List[Review]]:
+        """
+        Parse a review page given either its raw HTML (str/bytes) or a tree
+        already built by ``parse_html``.
+        """
+        tree = document if isinstance(document, etree._Element) else parse_html(document)
 
-        hotel_stats = self._extract_hotel_stats(soup)
-        reviews = self._extract_reviews(soup)
+        hotel_stats = self._extract_hotel_stats(tree)
+        reviews = self._extract_reviews(tree)
 
         # If totalReviews unknown, derive from count
         if hotel_stats.get("totalReviews") is None:
@@ -35,10 +194,14 @@ class BookingReviewParser:
 
         return hotel_stats, reviews
 
+    def extract_total_reviews(self, tree) -> Optional[int]:
+        """Total review count advertised on the page, if any."""
+        return self._extract_hotel_stats(tree).get("totalReviews")
+
     # --------------------------------------------------------------------- #
     # Hotel-level statistics
     # --------------------------------------------------------------------- #
-    def _extract_hotel_stats(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _extract_hotel_stats(self, tree) -> Dict[str, Any]:
         stats: Dict[str, Any] = {
             "totalReviews": None,
             "scores": {},
@@ -46,8 +209,8 @@ class BookingReviewParser:
 
         # Strategy 1: Look for JSON-LD containing aggregateRating
         try:
-            for script in soup.find_all("script", type="application/ld+json"):
-                data = json.loads(script.string or "{}")
+            for script in _XPATH_JSON_LD(tree):
+                data = _json_loads(script.text or "{}")
                 if isinstance(data, list):
                     for item in data:
                         self._populate_stats_from_jsonld(item, stats)
@@ -59,15 +222,15 @@ class BookingReviewParser:
         # Strategy 2: Booking-specific DOM elements
         # Total reviews (e.g., "Based on 263 reviews")
         if stats.get("totalReviews") is None:
-            total_node = soup.find(attrs={"data-testid": "review-score-subtitle"})
-            if total_node:
+            total_node = _first(_SEL_REVIEW_SCORE_SUBTITLE, tree)
+            if total_node is not None:
                 text = _safe_text(total_node)
                 stats["totalReviews"] = self._extract_int_from_text(text)
 
         # Category scores: often displayed as cards with labels
-        for score_block in soup.select('[data-testid="review-subscore"]'):
-            label_node = score_block.find(attrs={"data-testid": "review-subscore-title"})
-            score_node = score_block.find(attrs={"data-testid": "review-subscore-value"})
+        for score_block in _SEL_REVIEW_SUBSCORE(tree):
+            label_node = _first(_SEL_REVIEW_SUBSCORE_TITLE, score_block)
+            score_node = _first(_SEL_REVIEW_SUBSCORE_VALUE, score_block)
             label = _safe_text(label_node)
             score_text = _safe_text(score_node)
             if not label or not score_text:
@@ -77,7 +240,7 @@ class BookingReviewParser:
             except ValueError:
                 continue
 
-            key = self._normalize_score_label(label)
+            key = _normalize_score_label(label)
             stats["scores"][key] = {
                 "score": score_val,
                 "translation": label,
@@ -111,66 +274,78 @@ class BookingReviewParser:
 
     @staticmethod
     def _extract_int_from_text(text: str) -> Optional[int]:
-        digits = "".join(ch for ch in text if ch.isdigit())
-        if not digits:
+        # First number only, e.g. "Stayed 2 nights in August 2022" -> 2
+        match = _DIGITS_RE.search(text)
+        if not match:
             return None
-        try:
-            return int(digits)
-        except ValueError:
-            return None
-
-    @staticmethod
-    def _normalize_score_label(label: str) -> str:
-        return (
-            label.strip()
-            .lower()
-            .replace(" ", "_")
-            .replace("-", "_")
-        )
+        return int(_NON_DIGIT_RE.sub("", match.group()))
 
     # --------------------------------------------------------------------- #
     # Review-level data
     # --------------------------------------------------------------------- #
-    def _extract_reviews(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
-        reviews: List[Dict[str, Any]] = []
+    def _extract_reviews(self, tree) -> List[Review]:
+        reviews: List[Review] = []
 
         # Booking often wraps each review card
-        review_cards = soup.select('[data-testid="review-card"]')
+        review_cards = _SEL_REVIEW_CARD(tree)
         if not review_cards:
             # Fallback: look for common class names
-            review_cards = soup.select('.review_list_new_item_block, [itemprop="review"]')
-
-        for card in review_cards:
-            try:
-                review = self._parse_single_review(card)
-                if review:
-                    reviews.append(review)
-            except Exception as exc:
-                logger.debug("Failed to parse review card: %s", exc, exc_info=True)
+            review_cards = _SEL_REVIEW_CARD_FALLBACK(tree)
+
+        # Page language is the fallback for every card, so resolve it once
+        root = tree.getroottree().getroot()
+        page_language = root.get("lang") if root.tag == "html" else None
+        if page_language is not None:
+            page_language = _normalize_lang(page_language)
+
+        if self.executor is not None and review_cards:
+            fragments = [etree.tostring(card, with_tail=False) for card in review_cards]
+            parsed = self.executor.map(
+                _parse_card_worker,
+                fragments,
+                repeat(page_language),
+                repeat(self.language_hint),
+                chunksize=8,
+            )
+        else:
+            parsed = (self._parse_card_safely(card, page_language) for card in review_cards)
+
+        for review in parsed:
+            if review:
+                reviews.append(review)
 
         return reviews
 
-    def _parse_single_review(self, card) -> Optional[Dict[str, Any]]:
+    def _parse_card_safely(self, card, page_language: Optional[str]) -> Optional[Review]:
+        try:
+            return self._parse_single_review(card, page_language)
+        except Exception as exc:
+            logger.debug("Failed to parse review card: %s", exc, exc_info=True)
+            return None
+
+    def _parse_single_review(self, card, page_language: Optional[str] = None) -> Optional[Review]:
+        fields = _index_by_testid(card)
+
         # Overall score
-        score = self._parse_score(card)
+        score = self._parse_score(card, fields)
 
         # Title
-        title = self._parse_title(card)
+        title = self._parse_title(card, fields)
 
         # Review date
-        review_date = self._parse_review_date(card)
+        review_date = self._parse_review_date(card, fields)
 
         # Positive and negative content
-        positive, negative = self._parse_review_text(card)
+        positive, negative = self._parse_review_text(card, fields)
 
         # Language
         language = self._parse_language(card)
 
         # Guest information
-        guest = self._parse_guest_info(card)
+        guest_name, guest_country, guest_type = self._parse_guest_info(card, fields)
 
         # Booking information
-        booking = self._parse_booking_info(card)
+        room_type, nights, customer_type = self._parse_booking_info(fields)
 
         # Photos
         photos = self._parse_photos(card)
@@ -179,23 +354,29 @@ class BookingReviewParser:
             # Ignore empty cards
             return None
 
-        return {
-            "score": score,
-            "reviewDate": review_date,
-            "title": title,
-            "positiveContent": positive,
-            "negativeContent": negative,
-            "language": language or self.language_hint,
-            "guest": guest,
-            "booking": booking,
-            "photos": photos,
-        }
+        return Review(
+            score=score,
+            review_date=review_date,
+            title=title,
+            positive=positive,
+            negative=negative,
+            language=language or page_language or self.language_hint,
+            guest_name=guest_name,
+            guest_country=guest_country,
+            guest_type=guest_type,
+            room_type=room_type,
+            check_in=None,
+            check_out=None,
+            nights=nights,
+            customer_type=customer_type,
+            photos=photos,
+        )
 
-    def _parse_score(self, card) -> Optional[float]:
-        score_node = card.find(attrs={"data-testid": "review-score"})
-        if not score_node:
+    def _parse_score(self, card, fields: Dict[str, Any]) -> Optional[float]:
+        score_node = fields.get("review-score")
+        if score_node is None:
             # Alternative structures
-            score_node = card.find(class_="bui-review-score__badge") or card.find(itemprop="ratingValue")
+            score_node = _first(_SEL_SCORE_FALLBACK, card)
 
         text = _safe_text(score_node)
         if not text:
@@ -206,21 +387,21 @@ class BookingReviewParser:
         except ValueError:
             return None
 
-    def _parse_title(self, card) -> str:
-        title_node = card.find(attrs={"data-testid": "review-title"})
-        if not title_node:
-            title_node = card.find("h3") or card.find(class_="review-title")
+    def _parse_title(self, card, fields: Dict[str, Any]) -> str:
+        title_node = fields.get("review-title")
+        if title_node is None:
+            title_node = card.find(".//h3")
+        if title_node is None:
+            title_node = _first(_SEL_TITLE_FALLBACK, card)
 
         return _safe_text(title_node)
 
-    def _parse_review_date(self, card) -> Optional[int]:
+    def _parse_review_date(self, card, fields: Dict[str, Any]) -> Optional[int]:
         # Some Booking pages include machine-readable timestamps
-        time_node = card.find("time")
-        if time_node and time_node.has_attr("datetime"):
+        time_node = card.find(".//time")
+        if time_node is not None and time_node.get("datetime") is not None:
             # Try to convert ISO date to UNIX timestamp
-            import datetime as _dt
-
-            dt_val = time_node["datetime"]
+            dt_val = time_node.get("datetime")
             try:
                 dt = _dt.datetime.fromisoformat(dt_val.replace("Z", "+00:00"))
                 return int(dt.timestamp())
@@ -228,7 +409,7 @@ class BookingReviewParser:
                 pass
 
         # Fallback: Booking often has spans with "Reviewed: 26 August 2022"
-        date_node = card.find(attrs={"data-testid": "review-date"})
+        date_node = fields.get("review-date")
         text = _safe_text(date_node)
         if not text:
             return None
@@ -237,21 +418,21 @@ class BookingReviewParser:
         # mapping arbitrary localized dates to timestamps is error-prone
         return None
 
-    def _parse_review_text(self, card) -> Tuple[str, str]:
+    def _parse_review_text(self, card, fields: Dict[str, Any]) -> Tuple[str, str]:
         positive = ""
         negative = ""
 
-        positive_node = card.find(attrs={"data-testid": "review-positive-text"})
-        if positive_node:
+        positive_node = fields.get("review-positive-text")
+        if positive_node is not None:
             positive = _safe_text(positive_node)
 
-        negative_node = card.find(attrs={"data-testid": "review-negative-text"})
-        if negative_node:
+        negative_node = fields.get("review-negative-text")
+        if negative_node is not None:
             negative = _safe_text(negative_node)
 
         # Fallback: generic paragraphs
         if not (positive or negative):
-            paragraphs = [p for p in card.find_all("p") if _safe_text(p)]
+            paragraphs = [p for p in card.iter("p") if _safe_text(p)]
             if paragraphs:
                 if len(paragraphs) == 1:
                     positive = _safe_text(paragraphs[0])
@@ -263,93 +444,64 @@ class BookingReviewParser:
 
     def _parse_language(self, card) -> Optional[str]:
         # Booking uses lang attribute or data-review-language
-        if card.has_attr("lang"):
-            return card["lang"]
+        if card.get("lang") is not None:
+            return _normalize_lang(card.get("lang"))
 
         lang_attr = card.get("data-review-language")
         if lang_attr:
-            return lang_attr
-
-        # Sometimes language can be inferred from HTML tag
-        html = card.find_parent("html")
-        if html is not None and html.has_attr("lang"):
-            return html["lang"]
+            return _normalize_lang(lang_attr)
 
+        # Otherwise the caller falls back to the page-level <html lang>
         return None
 
-    def _parse_guest_info(self, card) -> Dict[str, Any]:
-        guest: Dict[str, Any] = {
-            "name": None,
-            "country": None,
-            "type": None,
-        }
-
-        name_node = card.find(attrs={"data-testid": "reviewer-name"})
-        if not name_node:
-            name_node = card.find(class_="bui-avatar-block__title")
-        guest["name"] = _safe_text(name_node) or None
+    def _parse_guest_info(self, card, fields: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        name_node = fields.get("reviewer-name")
+        if name_node is None:
+            name_node = _first(_SEL_NAME_FALLBACK, card)
+        name = _safe_text(name_node) or None
 
-        country_node = card.find(attrs={"data-testid": "reviewer-country"})
-        if not country_node:
-            country_node = card.find(class_="bui-avatar-block__subtitle")
-        guest["country"] = _safe_text(country_node) or None
+        country_node = fields.get("reviewer-country")
+        if country_node is None:
+            country_node = _first(_SEL_COUNTRY_FALLBACK, card)
+        country = _safe_text(country_node) or None
 
         # Guest type: "Family with young children", "Couple", etc.
-        type_node = card.find(attrs={"data-testid": "reviewer-type"})
-        if type_node:
-            guest["type"] = _safe_text(type_node) or None
-
-        return guest
-
-    def _parse_booking_info(self, card) -> Dict[str, Any]:
-        booking: Dict[str, Any] = {
-            "roomType": None,
-            "checkIn": None,
-            "checkOut": None,
-            "nights": None,
-            "customerType": None,
-        }
+        guest_type = None
+        type_node = fields.get("reviewer-type")
+        if type_node is not None:
+            guest_type = _safe_text(type_node) or None
+
+        return name, country, guest_type
 
+    def _parse_booking_info(self, fields: Dict[str, Any]) -> Tuple[Optional[str], Optional[int], Optional[str]]:
         # Room type might be in a span with an icon/label
-        room_node = card.find(attrs={"data-testid": "review-room-type"})
-        if room_node:
-            booking["roomType"] = _safe_text(room_node) or None
+        room_type = None
+        room_node = fields.get("review-room-type")
+        if room_node is not None:
+            room_type = _safe_text(room_node) or None
 
         # Booking summary block might include check-in/out text
-        stay_node = card.find(attrs={"data-testid": "review-stay-date"})
-        if stay_node:
+        nights = None
+        stay_node = fields.get("review-stay-date")
+        if stay_node is not None:
             text = _safe_text(stay_node)
             # Text is usually descriptive (e.g., "Stayed 2 nights in August 2022")
             # We won't attempt full parsing here, but we can derive nights.
             nights = self._extract_int_from_text(text)
-            if nights is not None:
-                booking["nights"] = nights
 
-        customer_type_node = card.find(attrs={"data-testid": "review-customer-type"})
-        if customer_type_node:
-            booking["customerType"] = _safe_text(customer_type_node) or None
+        customer_type = None
+        customer_type_node = fields.get("review-customer-type")
+        if customer_type_node is not None:
+            customer_type = _safe_text(customer_type_node) or None
 
-        return booking
+        return room_type, nights, customer_type
 
-    def _parse_photos(self, card) -> List[str]:
+    def _parse_photos(self, card) -> Tuple[str, ...]:
         photos: List[str] = []
-        for img in card.find_all("img"):
+        for img in card.iter("img"):
             src = img.get("src") or img.get("data-src")
-            if not src:
-                continue
-            try:
-                parsed = urlparse(src)
-                if not parsed.scheme or not parsed.netloc:
-                    continue
+            # Only absolute URLs; relative and protocol-relative paths are skipped
+            if src and src.startswith(_ABSOLUTE_URL_PREFIXES):
                 photos.append(src)
-            except Exception:
-                continue
         # Deduplicate while preserving order
-        seen = set()
-        unique_photos = []
-        for p in photos:
-            if p in seen:
-                continue
-            seen.add(p)
-            unique_photos.append(p)
-        return unique_photos
\ No newline at end of file
+        return tuple(dict.fromkeys(photos))
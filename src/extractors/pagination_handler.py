@@ -1,13 +1,86 @@
 import logging
-import time
-from typing import Generator, Optional
-from urllib.parse import urljoin
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Generator, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+
+from .booking_parser import parse_html
 
 logger = logging.getLogger("booking_reviews_scraper.pagination")
 
+# Next-page link strategies, by priority:
+# 1. <a rel="next" ...>
+# 2. pagination controls with "next" in their aria-label or text
+# 3. Booking's data-testid="review-paginator-next" link
+_XPATH_NEXT_LINKS = etree.XPath(
+    "(//a[@href != ''][contains(concat(' ', normalize-space(@rel), ' '), ' next ')])[1]"
+    " | (//a[@href != ''][contains(translate(@aria-label, 'NEXT', 'next'), 'next')"
+    " or contains(translate(string(.), 'NEXT', 'next'), 'next')])[1]"
+    " | (//a[@href != ''][@data-testid='review-paginator-next'])[1]"
+)
+
+def _next_link_priority(link) -> int:
+    if "next" in (link.get("rel") or "").split():
+        return 0
+    if link.get("data-testid") == "review-paginator-next":
+        return 2
+    return 1
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# Raw page body plus the charset declared in its Content-Type header, if any
+Page = Tuple[bytes, Optional[str]]
+
+def _get_offset(url: str) -> Optional[int]:
+    for key, value in parse_qsl(urlparse(url).query, keep_blank_values=True):
+        if key == "offset":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+def _with_offset(url: str, offset: int) -> str:
+    parsed = urlparse(url)
+    query = [
+        (key, str(offset) if key == "offset" else value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+    ]
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+def _same_page(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    pa, pb = urlparse(a), urlparse(b)
+    return pa._replace(query="", fragment="") == pb._replace(query="", fragment="") and sorted(
+        parse_qsl(pa.query, keep_blank_values=True)
+    ) == sorted(parse_qsl(pb.query, keep_blank_values=True))
+
+def _stop_offset(
+    tree,
+    start_url: str,
+    max_items: Optional[int],
+    total_reviews: Optional[Callable[[Any], Optional[int]]],
+) -> Optional[int]:
+    """Offset of the first review that will not be needed, if known."""
+    limits = []
+    if max_items is not None:
+        start_offset = _get_offset(start_url)
+        limits.append((start_offset if start_offset is not None else 0) + max_items)
+    if total_reviews is not None:
+        try:
+            total = total_reviews(tree)
+        except Exception as exc:
+            logger.debug("Could not read total review count: %s", exc)
+            total = None
+        if total:
+            limits.append(total)
+    return min(limits) if limits else None
+
 class PaginationHandler:
     """
     Handles pagination over Booking.com hotel review pages.
@@ -15,104 +88,162 @@ class PaginationHandler:
     This class relies on either:
     - <a rel="next" ...> links, or
     - pagination links with "Next" in their text or aria-label.
+
+    When the next-page link is an ``offset=`` query URL, the following pages
+    are predicted and fetched ahead concurrently (up to ``concurrency``
+    requests in flight). Pages are still yielded in order, and pagination
+    still stops at the first page without a next link.
+
+    Retries are expected to be handled by the session's transport adapter
+    (see ``create_http_session`` in main.py).
     """
 
     def __init__(
         self,
         session: requests.Session,
         timeout: int = 15,
-        max_retries: int = 3,
-        backoff_factor: float = 0.5,
+        concurrency: int = 4,
     ) -> None:
         self.session = session
         self.timeout = timeout
-        self.max_retries = max_retries
-        self.backoff_factor = backoff_factor
+        self.concurrency = max(1, concurrency)
 
-    def iter_pages(self, start_url: str) -> Generator[str, None, None]:
+    def iter_pages(
+        self,
+        start_url: str,
+        max_items: Optional[int] = None,
+        total_reviews: Optional[Callable[[Any], Optional[int]]] = None,
+    ) -> Generator[Any, None, None]:
         """
-        Yield HTML for each page starting from start_url until there is
-        no "next page" link or an error occurs.
+        Yield the parsed lxml tree for each page starting from start_url
+        until there is no "next page" link or an error occurs.
+
+        ``max_items`` and ``total_reviews`` (a callable reading the review
+        count from the first page) bound how far ahead pages are prefetched.
         """
         current_url = start_url
         visited_urls = set()
-
-        while current_url and current_url not in visited_urls:
-            visited_urls.add(current_url)
-            logger.debug("Fetching page: %s", current_url)
-            html = self._fetch(current_url)
-            if not html:
-                logger.warning("Empty response for %s, stopping pagination.", current_url)
-                break
-
-            yield html
-
-            try:
-                next_url = self._find_next_page_url(html, current_url)
-            except Exception as exc:
-                logger.debug("Error while resolving next page: %s", exc, exc_info=True)
-                next_url = None
-
-            if not next_url:
-                logger.info("No further pages detected after %s.", current_url)
+        stop_offset: Optional[int] = None
+        pending: Deque[Tuple[str, "Future[Optional[Page]]"]] = deque()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        try:
+            while current_url and current_url not in visited_urls:
+                visited_urls.add(current_url)
+                page = None
+                if pending and _same_page(pending[0][0], current_url):
+                    _, future = pending.popleft()
+                    page = future.result()
+                if not page:
+                    page = self._fetch(current_url)
+                if not page:
+                    logger.warning("Empty response for %s, stopping pagination.", current_url)
+                    break
+
+                try:
+                    tree = parse_html(*page)
+                except Exception as exc:
+                    logger.warning("Failed to parse HTML from %s: %s", current_url, exc)
+                    break
+
+                if current_url == start_url:
+                    stop_offset = _stop_offset(tree, start_url, max_items, total_reviews)
+
+                try:
+                    next_url = self._find_next_page_url(tree, current_url)
+                except Exception as exc:
+                    logger.debug("Error while resolving next page: %s", exc, exc_info=True)
+                    next_url = None
+
+                # Start fetching ahead before handing the page to the caller
+                if next_url:
+                    self._prefetch(pool, pending, current_url, next_url, stop_offset)
+
+                yield tree
+
+                if not next_url:
+                    logger.info("No further pages detected after %s.", current_url)
+                    break
+
+                current_url = next_url
+        finally:
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def _prefetch(
+        self,
+        pool: ThreadPoolExecutor,
+        pending: Deque[Tuple[str, "Future[Optional[Page]]"]],
+        current_url: str,
+        next_url: str,
+        stop_offset: Optional[int] = None,
+    ) -> None:
+        if pending and not _same_page(pending[0][0], next_url):
+            # Prediction was wrong; drop it and follow the real link
+            logger.debug("Discarding %d prefetched pages.", len(pending))
+            for _, future in pending:
+                future.cancel()
+            pending.clear()
+
+        next_offset = _get_offset(next_url)
+        if stop_offset is not None and next_offset is not None and next_offset >= stop_offset:
+            # Past the last wanted review; the link is still followed on demand
+            return
+
+        if not pending:
+            pending.append((next_url, pool.submit(self._fetch, next_url, True)))
+
+        current_offset = _get_offset(current_url)
+        if current_offset is None:
+            current_offset = 0
+        if next_offset is None or next_offset <= current_offset:
+            return
+
+        step = next_offset - current_offset
+        offset = _get_offset(pending[-1][0])
+        if offset is None:
+            offset = next_offset
+        while len(pending) < self.concurrency:
+            offset += step
+            if stop_offset is not None and offset >= stop_offset:
                 break
-
-            current_url = next_url
-
-    def _fetch(self, url: str) -> Optional[str]:
-        last_exception: Optional[Exception] = None
-
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                resp = self.session.get(url, timeout=self.timeout)
-                if resp.status_code >= 400:
-                    logger.warning("HTTP %s while requesting %s", resp.status_code, url)
-                resp.raise_for_status()
-                return resp.text
-            except Exception as exc:
-                last_exception = exc
-                sleep_time = self.backoff_factor * (2 ** (attempt - 1))
-                logger.warning(
-                    "Request attempt %d/%d failed for %s: %s. Retrying in %.1fs",
-                    attempt,
-                    self.max_retries,
-                    url,
-                    exc,
-                    sleep_time,
-                )
-                time.sleep(sleep_time)
-
-        logger.error("All retries failed for %s: %s", url, last_exception)
-        return None
-
-    def _find_next_page_url(self, html: str, current_url: str) -> Optional[str]:
-        soup = BeautifulSoup(html, "lxml")
-
-        # Strategy 1: <a rel="next" ...>
-        next_link = soup.find("a", rel="next")
-        if next_link and next_link.get("href"):
-            href = next_link["href"]
-            next_url = urljoin(current_url, href)
-            logger.debug("Next page from rel=next: %s", next_url)
-            return next_url
-
-        # Strategy 2: pagination controls with aria-label
-        for a in soup.find_all("a"):
-            aria = (a.get("aria-label") or "").strip().lower()
-            text = (a.get_text(strip=True) or "").lower()
-            if "next" in aria or "next" in text:
-                href = a.get("href")
-                if href:
-                    next_url = urljoin(current_url, href)
-                    logger.debug("Next page from aria/text match: %s", next_url)
-                    return next_url
-
-        # Strategy 3: data-testid based
-        next_btn = soup.find(attrs={"data-testid": "review-paginator-next"})
-        if next_btn and next_btn.name == "a" and next_btn.get("href"):
-            href = next_btn["href"]
-            next_url = urljoin(current_url, href)
-            logger.debug("Next page from data-testid: %s", next_url)
-            return next_url
-
-        return None
\ No newline at end of file
+            url = _with_offset(next_url, offset)
+            pending.append((url, pool.submit(self._fetch, url, True)))
+
+    def _fetch(self, url: str, prefetch: bool = False) -> Optional[Page]:
+        # Failed prefetches are only logged at debug level: predicted pages may
+        # lie past the last page, and a needed page is fetched again in the foreground.
+        log_level = logging.DEBUG if prefetch else logging.WARNING
+        logger.debug("Fetching page: %s", url)
+        try:
+            resp = self.session.get(url, timeout=self.timeout)
+            if resp.status_code >= 400:
+                logger.log(log_level, "HTTP %s while requesting %s", resp.status_code, url)
+            resp.raise_for_status()
+            if not resp.content:
+                return None
+            # Hand raw bytes to lxml: skips requests' charset detection and a
+            # full str decode of the page.
+            match = _CHARSET_RE.search(resp.headers.get("Content-Type", ""))
+            return resp.content, match.group(1) if match else None
+        except Exception as exc:
+            logger.log(
+                logging.DEBUG if prefetch else logging.ERROR,
+                "Request failed for %s: %s",
+                url,
+                exc,
+            )
+            return None
+
+    def _find_next_page_url(self, tree, current_url: str) -> Optional[str]:
+        # All three strategies are evaluated in a single XPath pass; it returns
+        # at most one candidate per strategy, in document order.
+        candidates = _XPATH_NEXT_LINKS(tree)
+        if not candidates:
+            return None
+
+        next_link = min(candidates, key=_next_link_priority)
+        next_url = urljoin(current_url, next_link.get("href"))
+        logger.debug("Next page (strategy %d): %s", _next_link_priority(next_link) + 1, next_url)
+        return next_url
@@ -1,20 +1,24 @@
 import argparse
 import json
 import logging
+import multiprocessing
 import os
 import sys
-from typing import Any, Dict, List, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Ensure local packages are importable when running as "python src/main.py"
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 if CURRENT_DIR not in sys.path:
     sys.path.append(CURRENT_DIR)
 
-from extractors.booking_parser import BookingReviewParser  # type: ignore
+from extractors.booking_parser import BookingReviewParser, Review  # type: ignore
 from extractors.pagination_handler import PaginationHandler  # type: ignore
-from outputs.dataset_exporter import export_dataset  # type: ignore
+from outputs.dataset_exporter import DatasetWriter, open_dataset_writer  # type: ignore
 
 logger = logging.getLogger("booking_reviews_scraper")
 
@@ -38,6 +42,8 @@ def load_settings(settings_path: str) -> Dict[str, Any]:
             "timeout": 15,
             "max_retries": 3,
             "backoff_factor": 0.5,
+            "concurrency": 4,
+            "parse_workers": 0,
             "default_max_items": 250,
             "output": {
                 "path": "data/output.sample.json",
@@ -74,6 +80,19 @@ def create_http_session(settings: Dict[str, Any]) -> requests.Session:
         }
     )
 
+    # Retries (with exponential backoff) are handled by urllib3 at the transport level
+    retry = Retry(
+        total=settings.get("max_retries", 3),
+        backoff_factor=settings.get("backoff_factor", 0.5),
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+    )
+    # Keep one pooled keep-alive connection per concurrent page fetch
+    pool_size = max(int(settings.get("concurrency", 4)), 1)
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
     return session
 
 def parse_input_config(path: Optional[str]) -> Dict[str, Any]:
@@ -136,58 +155,75 @@ def merge_config(
     cfg["settings"] = settings
     return cfg
 
+def _stream_pages(
+    paginator: PaginationHandler,
+    parser: BookingReviewParser,
+    hotel_url: str,
+    max_items: int,
+) -> Iterator[Tuple[Dict[str, Any], List[Review]]]:
+    pages = paginator.iter_pages(
+        hotel_url,
+        max_items=max_items,
+        total_reviews=parser.extract_total_reviews,
+    )
+    # Only fetching and parsing are best-effort here; errors raised by the
+    # consumer (e.g. the dataset writer) propagate to the caller.
+    try:
+        for page_count, page_tree in enumerate(pages, start=1):
+            logger.info("Parsing page %d", page_count)
+            yield parser.parse(page_tree)
+    except Exception as exc:
+        logger.error("Unexpected error during scraping: %s", exc, exc_info=True)
+
 def scrape_reviews(
     session: requests.Session,
     hotel_url: str,
     max_items: int,
     language: Optional[str],
     settings: Dict[str, Any],
+    writer: DatasetWriter,
+    executor: Optional[Executor] = None,
 ) -> Dict[str, Any]:
-    parser = BookingReviewParser(language_hint=language)
+    """
+    Scrape reviews and stream each one to ``writer`` as soon as it is parsed.
+    Returns the hotel statistics and the number of reviews written.
+    """
+    parser = BookingReviewParser(language_hint=language, executor=executor)
     paginator = PaginationHandler(
         session=session,
         timeout=settings.get("timeout", 15),
-        max_retries=settings.get("max_retries", 3),
-        backoff_factor=settings.get("backoff_factor", 0.5),
+        concurrency=settings.get("concurrency", 4),
     )
 
-    all_reviews: List[Dict[str, Any]] = []
+    review_count = 0
     hotel_stats: Optional[Dict[str, Any]] = None
 
     logger.info("Starting scrape for %s", hotel_url)
-    page_count = 0
-
-    try:
-        for page_html in paginator.iter_pages(hotel_url):
-            page_count += 1
-            logger.info("Parsing page %d", page_count)
-
-            parsed_stats, page_reviews = parser.parse(page_html)
 
-            if parsed_stats and not hotel_stats:
-                hotel_stats = parsed_stats
+    for parsed_stats, page_reviews in _stream_pages(paginator, parser, hotel_url, max_items):
+        if hotel_stats is None:
+            # Every exported row embeds the first page's hotel stats
+            hotel_stats = parsed_stats or {"totalReviews": None, "scores": {}}
+            writer.start(hotel_stats)
 
-            for r in page_reviews:
-                all_reviews.append(r)
-                if len(all_reviews) >= max_items:
-                    logger.info("Reached max_items limit (%d). Stopping pagination.", max_items)
-                    raise StopIteration()
+        for r in page_reviews[: max(max_items - review_count, 0)]:
+            writer.write(r)
+            review_count += 1
 
-    except StopIteration:
-        logger.debug("Pagination stopped after reaching max_items.")
-    except Exception as exc:
-        logger.error("Unexpected error during scraping: %s", exc, exc_info=True)
+        if review_count >= max_items:
+            logger.info("Reached max_items limit (%d). Stopping pagination.", max_items)
+            break
 
     hotel_stats = hotel_stats or {
-        "totalReviews": len(all_reviews),
+        "totalReviews": review_count,
         "scores": {},
     }
 
-    logger.info("Scraping complete. Collected %d reviews.", len(all_reviews))
+    logger.info("Scraping complete. Collected %d reviews.", review_count)
 
     return {
         "hotelStats": hotel_stats,
-        "reviews": all_reviews,
+        "reviewCount": review_count,
     }
 
 def ensure_parent_dir(path: str) -> None:
@@ -248,31 +284,51 @@ def main() -> None:
         logger.error("Configuration error: %s", exc)
         sys.exit(1)
 
-    session = create_http_session(cfg["settings"])
-
-    scrape_result = scrape_reviews(
-        session=session,
-        hotel_url=cfg["hotel_url"],
-        max_items=cfg["max_items"],
-        language=cfg["language"],
-        settings=cfg["settings"],
-    )
-
     output_path = cfg["output_path"]
     formats = cfg["formats"]
 
     ensure_parent_dir(output_path)
 
     try:
-        export_dataset(
-            hotel_stats=scrape_result["hotelStats"],
-            reviews=scrape_result["reviews"],
-            base_output_path=output_path,
-            formats=formats,
+        writer = open_dataset_writer(output_path, formats)
+    except Exception as exc:
+        logger.error("Failed to export dataset: %s", exc)
+        sys.exit(1)
+
+    session = create_http_session(cfg["settings"])
+
+    # Optional process pool for CPU-bound review-card parsing
+    parse_workers = int(cfg["settings"].get("parse_workers") or 0)
+    executor = None
+    if parse_workers > 1:
+        # Never fork: prefetch threads may hold requests/urllib3 locks by the
+        # time page 1 submits the first card and the pool starts its workers.
+        start_method = (
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        executor = ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=multiprocessing.get_context(start_method),
         )
+
+    try:
+        # Reviews are written while scraping; leaving the block finalizes the outputs
+        with writer:
+            scrape_reviews(
+                session=session,
+                hotel_url=cfg["hotel_url"],
+                max_items=cfg["max_items"],
+                language=cfg["language"],
+                settings=cfg["settings"],
+                writer=writer,
+                executor=executor,
+            )
     except Exception as exc:
         logger.error("Failed to export dataset: %s", exc)
         sys.exit(1)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     logger.info("All done. Output written to base path: %s", output_path)
 
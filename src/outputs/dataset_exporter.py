@@ -1,12 +1,30 @@
 import json
 import logging
 import os
-from typing import Any, Dict, List
+import re
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
 
-import pandas as pd
+from extractors.booking_parser import Review  # type: ignore
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
 
 logger = logging.getLogger("booking_reviews_scraper.exporter")
 
+def _dumps_indented(obj: Any) -> bytes:
+    """
+    Serialize obj as UTF-8 JSON with a two-space indent, nested one level
+    deep so it can be written as an element of a top-level array.
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    # Raw newlines only occur between tokens (they are escaped inside strings)
+    return b"  " + data.replace(b"\n", b"\n  ")
+
 def _derive_paths(base_output_path: str, formats: List[str]) -> Dict[str, str]:
     root, ext = os.path.splitext(base_output_path)
     paths: Dict[str, str] = {}
@@ -22,95 +40,259 @@ def _derive_paths(base_output_path: str, formats: List[str]) -> Dict[str, str]:
 
     return paths
 
-def _flatten_review(hotel_stats: Dict[str, Any], review: Dict[str, Any]) -> Dict[str, Any]:
-    flat: Dict[str, Any] = {}
+# Review field -> output column (hotel-level columns are prepended).
+_REVIEW_COLUMN_NAMES: Dict[str, str] = {
+    "score": "score",
+    "review_date": "reviewDate",
+    "title": "title",
+    "positive": "positiveContent",
+    "negative": "negativeContent",
+    "language": "language",
+    "guest_name": "guest.name",
+    "guest_country": "guest.country",
+    "guest_type": "guest.type",
+    "room_type": "booking.roomType",
+    "check_in": "booking.checkIn",
+    "check_out": "booking.checkOut",
+    "nights": "booking.nights",
+    "customer_type": "booking.customerType",
+    "photos": "photos",
+}
+if set(_REVIEW_COLUMN_NAMES) != set(Review._fields):
+    raise RuntimeError("_REVIEW_COLUMN_NAMES is out of sync with Review fields")
+
+# Columns follow the Review field order, so rows can be written positionally
+_REVIEW_COLUMNS: Tuple[str, ...] = tuple(_REVIEW_COLUMN_NAMES[f] for f in Review._fields)
 
-    # Hotel-level columns (some aggregated)
-    flat["hotelStats.totalReviews"] = hotel_stats.get("totalReviews")
+def _hotel_stats_columns(hotel_stats: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    """
+    Hotel-level columns are identical for every row, so they are computed
+    once per export and prepended to each flattened review.
+    """
+    columns = ["hotelStats.totalReviews"]
+    values = [hotel_stats.get("totalReviews")]
 
     scores = hotel_stats.get("scores") or {}
     if isinstance(scores, dict):
         for key, entry in scores.items():
             if isinstance(entry, dict):
-                flat[f"hotelStats.scores.{key}"] = entry.get("score")
-
-    # Core review fields
-    flat["score"] = review.get("score")
-    flat["reviewDate"] = review.get("reviewDate")
-    flat["title"] = review.get("title")
-    flat["positiveContent"] = review.get("positiveContent")
-    flat["negativeContent"] = review.get("negativeContent")
-    flat["language"] = review.get("language")
-
-    # Guest info
-    guest = review.get("guest") or {}
-    if isinstance(guest, dict):
-        flat["guest.name"] = guest.get("name")
-        flat["guest.country"] = guest.get("country")
-        flat["guest.type"] = guest.get("type")
-
-    # Booking info
-    booking = review.get("booking") or {}
-    if isinstance(booking, dict):
-        flat["booking.roomType"] = booking.get("roomType")
-        flat["booking.checkIn"] = booking.get("checkIn")
-        flat["booking.checkOut"] = booking.get("checkOut")
-        flat["booking.nights"] = booking.get("nights")
-        flat["booking.customerType"] = booking.get("customerType")
-
-    # Photos
-    photos = review.get("photos") or []
-    if isinstance(photos, list):
-        flat["photos"] = ";".join(str(p) for p in photos)
-
-    return flat
+                columns.append(f"hotelStats.scores.{key}")
+                values.append(entry.get("score"))
+
+    return columns, values
+
+def _flatten_review(review: Review) -> Tuple[Any, ...]:
+    # Review fields are laid out in _REVIEW_COLUMNS order; only photos need joining
+    return review._replace(photos=";".join(review.photos))
+
+_CSV_NEEDS_QUOTING = re.compile(r'[",\r\n]')
+
+def _csv_cell(value: Any) -> str:
+    """
+    Format one CSV cell like csv.writer's QUOTE_MINIMAL, except that a bare
+    carriage return also triggers quoting.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return repr(value)
+    text = str(value)
+    if _CSV_NEEDS_QUOTING.search(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def _csv_line(values: Iterable[Any]) -> str:
+    return ",".join(_csv_cell(v) for v in values)
+
+def _build_csv_row_formatter():
+    """
+    Generate ``format_row(review, prefix) -> bytes`` specialized to the Review
+    layout: one f-string with a cell per field, so writing a row involves no
+    per-column loop, intermediate list, or csv.writer dialect handling.
+    ``prefix`` is the pre-escaped hotel-level cells shared by every row.
+    """
+    cells = []
+    for field in Review._fields:
+        if field == "photos":
+            cells.append("{_cell(_join(r.photos))}")
+        else:
+            cells.append("{_cell(r.%s)}" % field)
+    source = (
+        "def format_row(r, prefix):\n"
+        "    return (prefix + f'" + ",".join(cells) + "\\n').encode('utf-8')\n"
+    )
+    namespace: Dict[str, Any] = {"_cell": _csv_cell, "_join": ";".join}
+    exec(source, namespace)
+    return namespace["format_row"]
+
+_format_csv_row = _build_csv_row_formatter()
+
+def _review_to_json(review: Review, hotel_stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "hotelStats": hotel_stats,
+        "score": review.score,
+        "reviewDate": review.review_date,
+        "title": review.title,
+        "positiveContent": review.positive,
+        "negativeContent": review.negative,
+        "language": review.language,
+        "guest": {
+            "name": review.guest_name,
+            "country": review.guest_country,
+            "type": review.guest_type,
+        },
+        "booking": {
+            "roomType": review.room_type,
+            "checkIn": review.check_in,
+            "checkOut": review.check_out,
+            "nights": review.nights,
+            "customerType": review.customer_type,
+        },
+        "photos": list(review.photos),
+    }
+
+class DatasetWriter:
+    """
+    Writes reviews to every requested output format as they arrive, so the
+    full dataset never has to be held in memory.
+
+    Every row embeds the hotel-level statistics (and they determine the
+    tabular columns), so ``start(hotel_stats)`` must be called before the
+    first ``write``. ``finalize`` closes all outputs; using the writer as a
+    context manager calls it automatically.
+    """
+
+    def __init__(self, base_output_path: str, formats: List[str]) -> None:
+        self.paths = _derive_paths(base_output_path, formats)
+        if not self.paths:
+            raise ValueError(f"No valid output formats requested: {formats}")
+
+        self.count = 0
+        self._started = False
+        self._finalized = False
+        self._hotel_stats: Dict[str, Any] = {}
+        self._hotel_values: List[Any] = []
+        self._json_file: Optional[BinaryIO] = None
+        self._csv_file: Optional[BinaryIO] = None
+        self._csv_prefix = ""
+        self._workbook: Any = None
+        self._worksheet: Any = None
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.finalize()
+        else:
+            # Don't write trailers (or retry start()) on top of a failure
+            self._close()
+
+    def start(self, hotel_stats: Dict[str, Any]) -> None:
+        if self._started:
+            raise RuntimeError("DatasetWriter.start() called twice")
+        self._hotel_stats = hotel_stats
+        try:
+            self._open(hotel_stats)
+        except Exception:
+            self._close()
+            raise
+        self._started = True
+
+    def _open(self, hotel_stats: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(list(self.paths.values())[0]) or ".", exist_ok=True)
+
+        if "json" in self.paths:
+            logger.info("Writing JSON output to %s", self.paths["json"])
+            self._json_file = open(self.paths["json"], "wb")
+
+        if "csv" in self.paths or "xlsx" in self.paths:
+            hotel_columns, self._hotel_values = _hotel_stats_columns(hotel_stats)
+            header = hotel_columns + list(_REVIEW_COLUMNS)
+
+            if "csv" in self.paths:
+                logger.info("Writing CSV output to %s", self.paths["csv"])
+                self._csv_file = open(self.paths["csv"], "wb")
+                self._csv_file.write((_csv_line(header) + "\n").encode("utf-8"))
+                self._csv_prefix = _csv_line(self._hotel_values) + ","
+
+            if "xlsx" in self.paths:
+                logger.info("Writing Excel output to %s", self.paths["xlsx"])
+                # Imported lazily so JSON/CSV-only runs don't pay for it
+                import xlsxwriter
+
+                # constant_memory flushes each row to disk once the next one starts
+                self._workbook = xlsxwriter.Workbook(
+                    self.paths["xlsx"],
+                    {
+                        "constant_memory": True,
+                        "strings_to_formulas": False,
+                        "strings_to_urls": False,
+                    },
+                )
+                self._worksheet = self._workbook.add_worksheet()
+                self._worksheet.write_row(0, 0, header)
+
+    def write(self, review: Review) -> None:
+        if not self._started:
+            raise RuntimeError("DatasetWriter.start() must be called before write()")
+
+        self.count += 1
+
+        if self._json_file is not None:
+            self._json_file.write(b"[\n" if self.count == 1 else b",\n")
+            self._json_file.write(_dumps_indented(_review_to_json(review, self._hotel_stats)))
+
+        if self._csv_file is not None:
+            self._csv_file.write(_format_csv_row(review, self._csv_prefix))
+
+        if self._worksheet is not None:
+            row = self._hotel_values + list(_flatten_review(review))
+            self._worksheet.write_row(self.count, 0, row)
+
+    def finalize(self, hotel_stats: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Close every output. If nothing was started yet, outputs are still
+        created (empty) for schema consistency.
+        """
+        if self._finalized:
+            return
+        if not self._started:
+            self.start(hotel_stats or {"totalReviews": 0, "scores": {}})
+        self._finalized = True
+
+        if not self.count:
+            logger.warning("No reviews to export. Still writing empty JSON for schema consistency.")
+
+        if self._json_file is not None:
+            self._json_file.write(b"\n]" if self.count else b"[]")
+        self._close()
+
+    def _close(self) -> None:
+        self._finalized = True
+        json_file, self._json_file = self._json_file, None
+        csv_file, self._csv_file = self._csv_file, None
+        workbook, self._workbook = self._workbook, None
+
+        if json_file is not None:
+            json_file.close()
+
+        if csv_file is not None:
+            csv_file.close()
+
+        if workbook is not None:
+            workbook.close()
+
+def open_dataset_writer(base_output_path: str, formats: List[str]) -> DatasetWriter:
+    return DatasetWriter(base_output_path, formats)
 
 def export_dataset(
     hotel_stats: Dict[str, Any],
-    reviews: List[Dict[str, Any]],
+    reviews: Iterable[Review],
     base_output_path: str,
     formats: List[str],
 ) -> None:
-    if not reviews:
-        logger.warning("No reviews to export. Still writing empty JSON for schema consistency.")
-
-    paths = _derive_paths(base_output_path, formats)
-    if not paths:
-        raise ValueError(f"No valid output formats requested: {formats}")
-
-    os.makedirs(os.path.dirname(list(paths.values())[0]) or ".", exist_ok=True)
-
-    # JSON export
-    if "json" in paths:
-        json_path = paths["json"]
-        logger.info("Writing JSON output to %s", json_path)
-        payload = []
+    with open_dataset_writer(base_output_path, formats) as writer:
+        writer.start(hotel_stats)
         for r in reviews:
-            item = {
-                "hotelStats": hotel_stats,
-                **{
-                    k: v
-                    for k, v in r.items()
-                    if k not in {"hotelStats"}
-                },
-            }
-            payload.append(item)
-
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-
-    # CSV/XLSX export use flattened rows
-    if "csv" in paths or "xlsx" in paths:
-        logger.info("Flattening reviews for tabular export.")
-        rows = [_flatten_review(hotel_stats, r) for r in reviews]
-        df = pd.DataFrame(rows)
-
-        if "csv" in paths:
-            csv_path = paths["csv"]
-            logger.info("Writing CSV output to %s", csv_path)
-            df.to_csv(csv_path, index=False)
-
-        if "xlsx" in paths:
-            xlsx_path = paths["xlsx"]
-            logger.info("Writing Excel output to %s", xlsx_path)
-            df.to_excel(xlsx_path, index=False)
\ No newline at end of file
+            writer.write(r)